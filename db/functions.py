@@ -1,4 +1,7 @@
-import json
+try:
+    import orjson as json
+except ImportError:
+    import json
 
 from db.db import Session
 from db.db_models import Order
@@ -1,8 +1,13 @@
+import os
+
 from db.db import init_db
 from qrScanner import qr_scanner
 from serialConnection import init_serial
 
+SERIAL_PORT = os.getenv("SERIAL_PORT", "COM10")
+SERIAL_BAUDRATE = int(os.getenv("SERIAL_BAUDRATE", "9600"))
+
 if __name__ == '__main__':
-    init_serial()
+    init_serial(SERIAL_PORT, SERIAL_BAUDRATE)
     init_db()
     qr_scanner()
@@ -1,40 +1,156 @@
+import os
+import queue
+import threading
+import time
+
 import cv2
+import numpy as np
 from playsound3 import playsound
 from db.functions import check_order
 import serialConnection
 
+HEADLESS_MODE = os.getenv("HEADLESS_MODE") == "1"
+
+FRAME_FOURCC = "MJPG"
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+FRAME_RATE = 30
+DETECT_SCALE = 0.5
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+
+GRAB_RETRY_DELAY = 0.05
+MAX_GRAB_FAILURES = 40
+FRAME_TIMEOUT = 5
+
+ORDER_CACHE_SIZE = 512
+ORDER_CACHE_TTL = 60
+
+order_cache = {}
+
+
+def cached_check_order(data):
+    now = time.monotonic()
+    expires = order_cache.pop(data, None)
+    if expires is not None and expires > now:
+        order_cache[data] = expires
+        return True
+
+    if not check_order(data):
+        return False
+
+    if len(order_cache) >= ORDER_CACHE_SIZE:
+        del order_cache[next(iter(order_cache))]
+    order_cache[data] = now + ORDER_CACHE_TTL
+    return True
+
+
+def capture_frames(cap, frames, wanted, stop):
+    frame = None
+    failures = 0
+    while not stop.is_set():
+        if not cap.grab():
+            failures += 1
+            if failures >= MAX_GRAB_FAILURES or not cap.isOpened():
+                return
+            time.sleep(GRAB_RETRY_DELAY)
+            continue
+
+        failures = 0
+        if not wanted.is_set():
+            continue
+
+        ret, image = cap.retrieve(frame)
+        if ret:
+            frame = image
+            wanted.clear()
+            frames.put_nowait(frame)
+
+
+def next_frame(frames, capture_thread):
+    deadline = time.monotonic() + FRAME_TIMEOUT
+    while True:
+        try:
+            return frames.get(timeout=0.1)
+        except queue.Empty:
+            if not capture_thread.is_alive():
+                raise RuntimeError("Camera capture stopped")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Camera stopped delivering frames")
+
+
+def verify_orders(payloads):
+    while True:
+        data = payloads.get()
+        if data is None:
+            break
+
+        if cached_check_order(data):
+            playsound('assets/successScan.wav', block=False)
+            serialConnection.send_command(b"SUCCESS_SCAN\n")
+        else:
+            playsound("assets/failureScan.wav", block=False)
+            serialConnection.send_command(b"FAILURE_SCAN\n")
+
 
 def qr_scanner():
     cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*FRAME_FOURCC))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+    cap.set(cv2.CAP_PROP_FPS, FRAME_RATE)
     detector = cv2.QRCodeDetector()
+    clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID)
+
+    frames = queue.Queue(maxsize=1)
+    wanted = threading.Event()
+    stop = threading.Event()
+    capture_thread = threading.Thread(target=capture_frames, args=(cap, frames, wanted, stop), daemon=True)
+    capture_thread.start()
+
+    payloads = queue.Queue()
+    verify_thread = threading.Thread(target=verify_orders, args=(payloads,), daemon=True)
+    verify_thread.start()
 
     last_data = None
+    gray = equalized = small = None
 
     while True:
-        ret, frame = cap.read()
-        data, bbox, _ = detector.detectAndDecode(frame)
-
-        if bbox is not None:
-            for i in range(len(bbox)):
-                pt1 = tuple(map(int, bbox[i][0]))
-                pt2 = tuple(map(int, bbox[(i + 1) % len(bbox)][0]))
-                cv2.line(frame, pt1, pt2, color=(255, 0, 0), thickness=2)
-
-            if data:
-                cv2.putText(frame, data, (int(bbox[0][0][0]), int(bbox[0][0][1]) - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                if data != last_data:
-                    last_data = data
-                    if check_order(data):
-                        playsound('assets/successScan.wav')
-                        serialConnection.ser.write(b"SUCCESS_SCAN\n")
-                    else:
-                        playsound("assets/failureScan.wav")
-                        serialConnection.ser.write(b"FAILURE_SCAN\n")
-
-        cv2.imshow("QR Scanner", frame)
-        if cv2.waitKey(10) & 0xFF == 27:
-            break
+        wanted.set()
+        frame = next_frame(frames, capture_thread)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        equalized = clahe.apply(gray, equalized)
+        small = cv2.resize(equalized, None, dst=small, fx=DETECT_SCALE, fy=DETECT_SCALE,
+                           interpolation=cv2.INTER_AREA)
+        found, bbox = detector.detect(small)
+
+        if found:
+            bbox = bbox / DETECT_SCALE
+            data, _ = detector.decode(equalized, bbox)
+            if not HEADLESS_MODE:
+                pts = bbox.astype(np.int32).reshape(-1, 1, 2)
+                cv2.polylines(frame, [pts], isClosed=True, color=(255, 0, 0), thickness=2)
+                if data:
+                    x, y = pts[0][0]
+                    cv2.putText(frame, data, (int(x), int(y) - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+            if data and data != last_data:
+                if not verify_thread.is_alive():
+                    raise RuntimeError("Order verification stopped")
+                last_data = data
+                payloads.put_nowait(data)
+
+        if not HEADLESS_MODE:
+            cv2.imshow("QR Scanner", frame)
+            if cv2.waitKey(1) & 0xFF == 27:
+                break
 
+    stop.set()
+    capture_thread.join()
+    payloads.put(None)
+    verify_thread.join()
     cap.release()
-    cv2.destroyAllWindows()
+    if not HEADLESS_MODE:
+        cv2.destroyAllWindows()
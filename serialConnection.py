@@ -1,9 +1,54 @@
+import os
 import serial
 import time
 
+MAX_COMMAND_BYTES = 16
+WRITE_TIMEOUT_MARGIN = 10
+RESET_DELAY = 2
+
 ser = None
+ready_at = 0.0
+
+def write_timeout(baudrate):
+    # 10 bits per byte on the wire (start + 8 data + stop)
+    return MAX_COMMAND_BYTES * 10 / baudrate * WRITE_TIMEOUT_MARGIN
+
 
 def init_serial(port='COM10', baudrate=9600):
-    global ser
-    ser = serial.Serial(port, 9600)
-    time.sleep(2)
+    global ser, ready_at
+    ser = serial.Serial(port, baudrate, write_timeout=write_timeout(baudrate))
+    enable_low_latency(ser)
+    ready_at = time.monotonic() + RESET_DELAY
+
+
+def enable_low_latency(connection):
+    try:
+        connection.set_low_latency_mode(True)
+    except (AttributeError, NotImplementedError, ValueError):
+        pass
+
+    latency_timer = f"/sys/bus/usb-serial/devices/{os.path.basename(connection.port)}/latency_timer"
+    try:
+        with open(latency_timer, "w") as f:
+            f.write("1")
+    except OSError:
+        pass
+
+
+def send_command(command):
+    delay = ready_at - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+    try:
+        ser.write(command)
+        return True
+    except serial.SerialTimeoutException:
+        pass
+
+    deadline = time.monotonic() + ser.write_timeout
+    while ser.out_waiting and time.monotonic() < deadline:
+        time.sleep(0.001)
+    if ser.out_waiting:
+        ser.reset_output_buffer()
+    return False